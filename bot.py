@@ -4,13 +4,24 @@ Los Angeles Chargers Bot
 This bot fetches news from RSS feeds and tweets about Chargers-related news.
 """
 import os
+import atexit
 import re
+import json
+import hashlib
+import calendar
 import time
 import feedparser
+import requests
+from requests.adapters import HTTPAdapter
 import tweepy
 import logging
-from datetime import datetime
-from typing import List, Dict, Set
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from itertools import chain
+from operator import attrgetter
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from typing import Callable, Iterable, List, Dict, Optional, Tuple
 from openai import OpenAI
 import google.generativeai as genai
 from config import (
@@ -28,6 +39,12 @@ from config import (
     GEMINI_MODEL,
     NEWS_SOURCES,
     POSTED_ARTICLES_FILE,
+    POSTED_RETENTION_DAYS,
+    FEED_CACHE_FILE,
+    FEED_CACHE_MAX_AGE_DAYS,
+    FEED_TIMEOUT_SECONDS,
+    FEED_BODY_CACHE_SECONDS,
+    FEED_BODY_CACHE_DIR,
     DEBUG
 )
 
@@ -38,13 +55,185 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Identify ourselves to feed servers (some reject the default library user agents)
+FEED_USER_AGENT = "ChargersBot/1.0 (+https://github.com/mattmurph9/chargers-bot)"
+FEED_ACCEPT_HEADER = (
+    "application/atom+xml,application/rdf+xml,application/rss+xml,"
+    "application/xml;q=0.9,text/xml;q=0.2,*/*;q=0.1"
+)
+
+# Upper bound on feeds downloaded at once (stays below the HTTP connection pool size)
+MAX_FEED_WORKERS = 10
+
+# Bump when the shape of cached feed entries changes so older records are ignored
+FEED_CACHE_VERSION = 2
+
+# Pending posted URLs are written out at least this often
+POSTED_FLUSH_EVERY = 5
+
+# Posted undated articles still in a feed get their record re-stamped at most
+# this often, so retention pruning never forgets them while they can reappear
+POSTED_REFRESH_SECONDS = 86400
+
+# Thread replies are sent right away and only retried (with backoff) if the
+# parent tweet isn't visible yet
+REPLY_RETRIES = 3
+REPLY_RETRY_DELAY_SECONDS = 0.5
+
+# Twitter counts every link as a t.co URL of this length, however long it really is
+TCO_URL_LENGTH = 23
+MAX_TITLE_LENGTH = 280 - TCO_URL_LENGTH - 10  # 10 chars for "..." and spacing
+
+
+def url_digest(url) -> int:
+    """Return a 64-bit BLAKE2b digest of a URL (str or UTF-8 bytes) for compact membership checks."""
+    if isinstance(url, str):
+        url = url.encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(url, digest_size=8).digest(), 'little')
+
+
+def title_key(title: str) -> str:
+    """Normalize a title so syndicated copies with different case or spacing compare equal."""
+    return ' '.join(title.lower().split())
+
+
+def title_digest(key) -> int:
+    """Return the digest of a normalized title (str or UTF-8 bytes).
+    
+    Prefixed with a tab, which never starts a stored URL, so title and URL
+    digests can share one posted set.
+    """
+    if isinstance(key, str):
+        key = key.encode('utf-8')
+    return url_digest(b'\t' + key)
+
+
+# Query parameters that only track where a click came from
+_TRACKING_PARAM_PREFIX = 'utm_'
+_TRACKING_PARAMS = {'fbclid', 'gclid', 'mc_cid', 'mc_eid', 'cmpid', 'ref'}
+
+
+def canonical_url(url: str) -> str:
+    """Normalize a URL so syndicated copies of the same article compare equal.
+    
+    Lowercases the scheme and host, drops the fragment, tracking query
+    parameters and any trailing slash on the path. Malformed links (e.g. an
+    unclosed IPv6 bracket) are returned as-is, so one bad entry can't abort a fetch.
+    """
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url.strip()
+    query = urlencode([
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not (key.lower().startswith(_TRACKING_PARAM_PREFIX) or key.lower() in _TRACKING_PARAMS)
+    ])
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip('/'), query, ''))
+
+
+# Sources with at most this many keywords use substring checks instead of a regex
+_LITERAL_KEYWORD_LIMIT = 3
+
+# HTML tags that sometimes show up in feed titles
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+
+# Numbering the AI sometimes prefixes thread tweets with ("1/8 -", "Tweet 1:")
+_TWEET_NUM_RE = re.compile(r'^\d+/\d+\s*[-:]?\s*')
+_TWEET_LABEL_RE = re.compile(r'^Tweet\s+\d+:\s*', re.IGNORECASE)
+
+# Prompts for the heartbreaking loss thread (built once; they never change)
+HEARTBREAK_SYSTEM_PROMPT = "You are a passionate Los Angeles Chargers fan who loves to commiserate about heartbreaking losses. You write engaging, emotional Twitter threads that tell the complete story of games. Always start by establishing context: which teams are playing, where the game was played, and what the game meant (playoff implications, rivalry, must-win situation, etc.). Then include all key moments, scores, plays, and turning points. You have an encyclopedic knowledge of Chargers history and can recount games in vivid detail, taking readers through the entire game experience moment by moment."
+
+HEARTBREAK_PROMPT = """Generate a Twitter thread (8-12 tweets) about a past heartbreaking Chargers loss.
+
+CRITICAL: Search Pro-Football-Reference.com to verify ALL facts. Only include verified information.
+
+Thread structure:
+1. START: Context (who, where, when, what it meant) - verify from Pro-Football-Reference.com
+2. Tell the full game story chronologically with key moments
+3. Include actual scores, players, plays - all verified from Pro-Football-Reference.com
+4. Build tension toward the heartbreaking ending
+
+Requirements:
+- Verify scores, player names, dates, stadium from Pro-Football-Reference.com
+- Each tweet under 280 characters
+- Number tweets (1/8, 2/8, etc.)
+- Conversational fan voice
+- If you can't verify it from Pro-Football-Reference.com, don't include it
+
+Format: One tweet per line, ready to post."""
+
+# Gemini has no separate system role, so both prompts go in one message
+HEARTBREAK_GEMINI_PROMPT = f"{HEARTBREAK_SYSTEM_PROMPT}\n\n{HEARTBREAK_PROMPT}"
+
+
+@dataclass
+class Article:
+    """A Chargers-related article pulled from an RSS feed."""
+    # Declared by hand (not slots=True) to keep Python 3.8 support
+    __slots__ = ('title', 'link', 'published', 'pub_ts', 'source')
+    
+    title: str
+    link: str
+    published: str
+    pub_ts: int  # Unix timestamp of publication (0 if unknown, so undated articles sort last)
+    source: str
+
+
+def parse_published(published_parsed) -> int:
+    """Convert feedparser's UTC struct_time into a Unix timestamp (0 if unusable)."""
+    if not published_parsed:
+        return 0
+    try:
+        return calendar.timegm(published_parsed[:6])
+    except Exception as e:
+        logger.warning(f"Error parsing article date: {e}")
+        return 0
+
+
+def build_keyword_matcher(keywords: Iterable[str]) -> Callable[[str], bool]:
+    """Build a case-insensitive "does this text mention any keyword" check.
+    
+    A few keywords are checked with plain substring searches on the lowered
+    text, which beats the regex engine for small sets. Larger sets use one
+    alternation so the text is scanned once no matter how many keywords there
+    are. Duplicates are dropped and longer keywords are tried first.
+    """
+    unique = sorted({keyword.lower() for keyword in keywords if keyword}, key=len, reverse=True)
+    if not unique:
+        return lambda text: False
+    
+    if len(unique) <= _LITERAL_KEYWORD_LIMIT:
+        literals = tuple(unique)
+        
+        def matches(text: str) -> bool:
+            lowered = text.lower()
+            return any(keyword in lowered for keyword in literals)
+        return matches
+    
+    pattern = re.compile('|'.join(re.escape(keyword) for keyword in unique), re.IGNORECASE)
+    return lambda text: pattern.search(text) is not None
+
 
 class ChargersNewsBot:
     def __init__(self):
         """Initialize the Twitter bot."""
         self.setup_twitter_api()
         self.setup_ai_client()
-        self.posted_articles = self.load_posted_articles()
+        self.setup_http_session()
+        self.setup_feed_body_cache()
+        # Loaded (and pruned) at the start of every run(), so a long-lived bot
+        # keeps dropping entries older than POSTED_RETENTION_DAYS
+        self.posted_articles: Dict[int, int] = {}
+        # New entries are buffered and appended to POSTED_ARTICLES_FILE in one write
+        self._pending_writes: List[str] = []
+        atexit.register(self.flush_posted_articles)
+        self.feed_cache = self.load_feed_cache()
+        # Keyed by feed URL, which (unlike the display name) is unique per source
+        self._keyword_matchers = {
+            source['url']: build_keyword_matcher(source['keywords'])
+            for source in NEWS_SOURCES
+        }
     
     def setup_ai_client(self):
         """Set up AI provider client (OpenAI, Groq, or Gemini)."""
@@ -84,6 +273,16 @@ class ChargersNewsBot:
             logger.error(f"Failed to initialize AI provider ({self.ai_provider}): {e}")
             self.ai_client = None
         
+        if DEBUG:
+            self._log_ai_config()
+    
+    def _log_ai_config(self):
+        """Log which AI credentials are configured (never the keys themselves)."""
+        logger.debug(f"AI_PROVIDER={self.ai_provider}")
+        logger.debug(f"GROQ_API_KEY set: {bool(GROQ_API_KEY)} (model: {GROQ_MODEL})")
+        logger.debug(f"GEMINI_API_KEY set: {bool(GEMINI_API_KEY)} (model: {GEMINI_MODEL})")
+        logger.debug(f"OPENAI_API_KEY set: {bool(OPENAI_API_KEY)} (model: {OPENAI_MODEL})")
+        
     def setup_twitter_api(self):
         """Set up Twitter API v2 client."""
         try:
@@ -100,94 +299,386 @@ class ChargersNewsBot:
             logger.error(f"Failed to initialize Twitter API: {e}")
             raise
     
-    def load_posted_articles(self) -> Set[str]:
-        """Load list of already posted article URLs to avoid duplicates."""
+    def setup_http_session(self):
+        """Set up a pooled HTTP session so feed requests reuse connections (keep-alive)."""
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16)
+        self.http.mount('https://', adapter)
+        self.http.mount('http://', adapter)
+        self.http.headers['User-Agent'] = FEED_USER_AGENT
+        # Same preference feedparser sends when it does the fetching itself
+        self.http.headers['Accept'] = FEED_ACCEPT_HEADER
+    
+    def setup_feed_body_cache(self):
+        """Set up the private directory feed bodies are cached in (None disables the cache)."""
+        self.feed_body_cache_dir = None
+        if FEED_BODY_CACHE_SECONDS <= 0:
+            return
+        
+        try:
+            os.makedirs(FEED_BODY_CACHE_DIR, mode=0o700, exist_ok=True)
+            # Cached bodies are trusted as feed content, so only use a directory
+            # that we own and nobody else can write to
+            if hasattr(os, 'getuid') and os.stat(FEED_BODY_CACHE_DIR).st_uid != os.getuid():
+                logger.warning(f"Feed body cache disabled: {FEED_BODY_CACHE_DIR} is owned by another user")
+                return
+            os.chmod(FEED_BODY_CACHE_DIR, 0o700)
+            self.feed_body_cache_dir = FEED_BODY_CACHE_DIR
+        except OSError as e:
+            logger.warning(f"Feed body cache disabled: {e}")
+    
+    def load_posted_articles(self) -> Dict[int, int]:
+        """Load already posted article URLs and titles to avoid duplicates.
+        
+        Returns digests of each URL and title mapped to when it was (last)
+        posted. Each line is "<unix timestamp>\t<url>", optionally followed by
+        "\t<normalized title>". Entries older than POSTED_RETENTION_DAYS are
+        dropped, repeated URLs keep only their newest line, and the file is
+        rewritten to match. Lines from the old URL-only format are stamped with
+        the current time.
+        """
         if not os.path.exists(POSTED_ARTICLES_FILE):
-            return set()
+            return {}
         
         try:
-            with open(POSTED_ARTICLES_FILE, 'r') as f:
-                return set(line.strip() for line in f if line.strip())
+            now = int(time.time())
+            cutoff = now - POSTED_RETENTION_DAYS * 86400
+            posted = {}
+            latest: Dict[bytes, Tuple[int, bytes]] = {}
+            needs_rewrite = False
+            
+            # One read and a C-level split instead of a readline() call per line;
+            # lines stay bytes since they're only hashed and written back
+            with open(POSTED_ARTICLES_FILE, 'rb') as f:
+                data = f.read()
+            
+            for line in data.splitlines():
+                line = line.strip()
+                if not line:
+                    continue
+                
+                timestamp, _, record = line.partition(b'\t')
+                try:
+                    posted_at = int(timestamp)
+                except ValueError:
+                    posted_at = None
+                if not record or posted_at is None:
+                    # Old URL-only line: keep it for a full retention window
+                    posted_at, record, needs_rewrite = now, line, True
+                elif posted_at < cutoff:
+                    needs_rewrite = True
+                    continue
+                
+                url, _, title = record.partition(b'\t')
+                if url in latest:
+                    # Re-stamped by _refresh_posted; only the newest line is kept
+                    needs_rewrite = True
+                    if latest[url][0] > posted_at:
+                        continue
+                latest[url] = (posted_at, record)
+            
+            for url, (posted_at, record) in latest.items():
+                posted[url_digest(url)] = posted_at
+                title = record.partition(b'\t')[2]
+                if title:
+                    title_hash = title_digest(title)
+                    posted[title_hash] = max(posted_at, posted.get(title_hash, 0))
+            
+            if needs_rewrite:
+                self._rewrite_posted_articles([b'%d\t%s\n' % entry for entry in latest.values()])
+            return posted
         except Exception as e:
             logger.error(f"Error loading posted articles: {e}")
-            return set()
+            return {}
     
-    def save_posted_article(self, url: str):
-        """Save article URL to prevent duplicate posts."""
-        self.posted_articles.add(url)
+    def _rewrite_posted_articles(self, lines: List[bytes]):
+        """Atomically replace POSTED_ARTICLES_FILE with the given lines."""
+        tmp_file = f"{POSTED_ARTICLES_FILE}.tmp"
         try:
-            with open(POSTED_ARTICLES_FILE, 'a') as f:
-                f.write(f"{url}\n")
+            with open(tmp_file, 'wb') as f:
+                f.write(b''.join(lines))
+            os.replace(tmp_file, POSTED_ARTICLES_FILE)
         except Exception as e:
-            logger.error(f"Error saving posted article: {e}")
+            logger.error(f"Error pruning posted articles: {e}")
     
-    def fetch_news(self) -> List[Dict]:
-        """Fetch news from all configured RSS feeds."""
+    def is_posted(self, url: str, title: str = '') -> bool:
+        """Check whether an article has already been posted.
+        
+        Matches the URL (or a copy with other tracking parameters) and, since
+        syndicated copies often live at unrelated URLs, the normalized title.
+        """
+        key = title_key(title)
+        if key and title_digest(key) in self.posted_articles:
+            return True
+        # Older entries were stored as the raw URL and stay until they're pruned
+        return url_digest(canonical_url(url)) in self.posted_articles or url_digest(url) in self.posted_articles
+    
+    def save_posted_article(self, url: str, title: str = ''):
+        """Record article URL and title to prevent duplicate posts (written out by flush_posted_articles)."""
+        self._record_posted(url, title)
+        # Bound how much would be lost if the process is killed mid-run
+        if len(self._pending_writes) >= POSTED_FLUSH_EVERY:
+            self.flush_posted_articles()
+    
+    def _refresh_posted(self, url: str, title: str = ''):
+        """Re-stamp a posted article that's still in a feed so pruning doesn't forget it."""
+        if self.posted_articles.get(url_digest(canonical_url(url)), 0) < time.time() - POSTED_REFRESH_SECONDS:
+            self._record_posted(url, title)
+    
+    def _record_posted(self, url: str, title: str):
+        """Mark an article as posted now and queue its line for POSTED_ARTICLES_FILE."""
+        now = int(time.time())
+        url = canonical_url(url)
+        key = title_key(title)
+        self.posted_articles[url_digest(url)] = now
+        if key:
+            self.posted_articles[title_digest(key)] = now
+            self._pending_writes.append(f"{now}\t{url}\t{key}\n")
+        else:
+            self._pending_writes.append(f"{now}\t{url}\n")
+    
+    def flush_posted_articles(self):
+        """Append all pending posted URLs to POSTED_ARTICLES_FILE in a single write."""
+        if not self._pending_writes:
+            return
+        
+        try:
+            with open(POSTED_ARTICLES_FILE, 'a', encoding='utf-8') as f:
+                f.write(''.join(self._pending_writes))
+            self._pending_writes.clear()
+        except Exception as e:
+            logger.error(f"Error saving posted articles: {e}")
+    
+    def load_feed_cache(self) -> Dict[str, Dict]:
+        """Load validators and matched entries from previous feed fetches."""
+        if not os.path.exists(FEED_CACHE_FILE):
+            return {}
+        
+        try:
+            with open(FEED_CACHE_FILE, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading feed cache: {e}")
+            return {}
+    
+    def save_feed_cache(self):
+        """Write the feed cache to disk atomically, dropping feeds not fetched for a week."""
+        cutoff = time.time() - FEED_CACHE_MAX_AGE_DAYS * 86400
+        self.feed_cache = {
+            url: record for url, record in self.feed_cache.items()
+            if record.get('last_used', 0) >= cutoff
+        }
+        tmp_file = f"{FEED_CACHE_FILE}.tmp"
+        try:
+            with open(tmp_file, 'w') as f:
+                json.dump(self.feed_cache, f)
+            os.replace(tmp_file, FEED_CACHE_FILE)
+        except Exception as e:
+            logger.error(f"Error saving feed cache: {e}")
+    
+    def fetch_news(self, skip_posted: bool = False, recent_only_hours: Optional[int] = None) -> List[Article]:
+        """Fetch news from all configured RSS feeds.
+        
+        Feeds that haven't changed since the last fetch (HTTP 304, or the same
+        bytes as last time) are served from the Chargers-related entries cached
+        in FEED_CACHE_FILE, without parsing them again. skip_posted and
+        recent_only_hours drop already posted and old articles.
+        """
+        if not NEWS_SOURCES:
+            return []
+        
+        fetch_one = partial(
+            self._fetch_one,
+            skip_posted=skip_posted,
+            # One cutoff for the whole fetch; entries published before it are dropped
+            cutoff_ts=time.time() - recent_only_hours * 3600 if recent_only_hours is not None else None
+        )
+        # Feeds are fetched concurrently since each one is dominated by network wait
+        with ThreadPoolExecutor(max_workers=min(MAX_FEED_WORKERS, len(NEWS_SOURCES))) as executor:
+            results = list(executor.map(fetch_one, NEWS_SOURCES))
+        
+        self.save_feed_cache()
+        
+        # The same story is often syndicated to several feeds, sometimes with
+        # tracking parameters or under a different URL; keep the first copy.
+        # Entries without a link can't be tracked in the posted list, so drop them too.
         all_articles = []
+        seen_links = set()
+        seen_titles = set()
+        for article in chain.from_iterable(results):
+            if not article.link:
+                continue
+            link = canonical_url(article.link)
+            # Untitled entries have nothing to compare, so only their links are deduped
+            title = title_key(article.title)
+            if link in seen_links or (title and title in seen_titles):
+                continue
+            seen_links.add(link)
+            if title:
+                seen_titles.add(title)
+            all_articles.append(article)
+        return all_articles
+    
+    def _feed_body_cache_path(self, url: str) -> str:
+        """Path of the short-lived on-disk copy of a feed's raw bytes."""
+        return os.path.join(self.feed_body_cache_dir, f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.xml")
+    
+    def _download_feed(self, source: Dict) -> Optional[Tuple[bytes, Optional[Dict]]]:
+        """Download a feed's raw bytes and response headers (None if unchanged).
+        
+        Sends the cached ETag/Last-Modified, when we also have the entries they
+        describe, so an unchanged feed comes back as an empty 304.
+        
+        Bodies fetched within the last FEED_BODY_CACHE_SECONDS are reused from
+        disk, so back-to-back runs (e.g. --dry-run then --test) skip the network.
+        """
+        cache_path = self._feed_body_cache_path(source['url']) if self.feed_body_cache_dir else None
+        try:
+            if cache_path and os.path.getmtime(cache_path) > time.time() - FEED_BODY_CACHE_SECONDS:
+                with open(cache_path, 'rb') as f:
+                    return f.read(), None
+        except OSError:
+            pass
+        
+        headers = {}
+        cached = self.feed_cache.get(source['url'], {})
+        if self._cached_entries(source, cached) is not None:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('modified'):
+                headers['If-Modified-Since'] = cached['modified']
+        
+        # Explicit timeout so one slow feed can't stall the run
+        response = self.http.get(
+            source['url'],
+            headers=headers,
+            timeout=FEED_TIMEOUT_SECONDS
+        )
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
         
-        for source in NEWS_SOURCES:
+        if cache_path:
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
             try:
-                logger.info(f"Fetching news from {source['name']}")
-                feed = feedparser.parse(source['url'])
-                
-                for entry in feed.entries:
-                    # Check if article is about Chargers
-                    title = entry.get('title', '').lower()
-                    summary = entry.get('summary', '').lower()
-                    text_content = f"{title} {summary}"
-                    
-                    # Check for keywords
-                    if any(keyword.lower() in text_content for keyword in source['keywords']):
-                        article = {
-                            'title': entry.get('title', 'No title'),
-                            'link': entry.get('link', ''),
-                            'published': entry.get('published', ''),
-                            'published_parsed': entry.get('published_parsed'),
-                            'summary': entry.get('summary', ''),
-                            'source': source['name']
-                        }
-                        all_articles.append(article)
-                
-                logger.info(f"Found {len(feed.entries)} articles from {source['name']}")
-                
-            except Exception as e:
-                logger.error(f"Error fetching from {source['name']}: {e}")
+                with open(tmp_path, 'wb') as f:
+                    f.write(response.content)
+                os.replace(tmp_path, cache_path)
+            except OSError as e:
+                logger.warning(f"Could not cache feed body for {source['name']}: {e}")
         
-        return all_articles
+        return response.content, {k.lower(): v for k, v in response.headers.items()}
+    
+    def _cached_entries(self, source: Dict, cached: Dict) -> Optional[List[Dict]]:
+        """Return a feed's cached entries, or None if they're missing or stale.
+        
+        Entries are only reused if they were stored in the current format and
+        matched against the source's current keywords.
+        """
+        if cached.get('version') != FEED_CACHE_VERSION or cached.get('keywords') != sorted(source['keywords']):
+            return None
+        return cached.get('entries')
+    
+    def _fetch_one(self, source: Dict, skip_posted: bool = False,
+                   cutoff_ts: Optional[float] = None) -> List[Article]:
+        """Fetch a single RSS feed and return its Chargers-related articles."""
+        articles = []
+        
+        try:
+            logger.info(f"Fetching news from {source['name']}")
+            cached = self.feed_cache.get(source['url'], {})
+            downloaded = self._download_feed(source)
+            if downloaded is None:
+                logger.info(f"No changes from {source['name']} since last check")
+                # Validators are only sent when the cached entries are usable
+                entries = self._cached_entries(source, cached) or []
+            else:
+                feed_body, response_headers = downloaded
+                # Some feeds send no validators (or change them without changing
+                # the content), so identical bytes skip the parse as well
+                body_hash = hashlib.blake2b(feed_body, digest_size=16).hexdigest()
+                entries = self._cached_entries(source, cached) if cached.get('body_hash') == body_hash else None
+                if entries is None:
+                    entries = self._parse_entries(source, feed_body, response_headers)
+                cached = {
+                    'version': FEED_CACHE_VERSION,
+                    'keywords': sorted(source['keywords']),
+                    # A body read from the short-lived disk cache has no headers; keep the old validators
+                    'etag': response_headers.get('etag') if response_headers else cached.get('etag'),
+                    'modified': response_headers.get('last-modified') if response_headers else cached.get('modified'),
+                    'body_hash': body_hash,
+                    'entries': entries
+                }
+            cached['last_used'] = time.time()
+            self.feed_cache[source['url']] = cached
+            
+            for entry in entries:
+                # Cheap rejections first: too old (most of a feed's tail), then already posted.
+                # Undated entries (pub_ts 0) are assumed recent
+                if cutoff_ts is not None and entry['pub_ts'] and entry['pub_ts'] < cutoff_ts:
+                    continue
+                if skip_posted and self.is_posted(entry['link'], entry['title']):
+                    if not entry['pub_ts']:
+                        # They never age out of the cutoff, so keep their posted record alive
+                        self._refresh_posted(entry['link'], entry['title'])
+                    continue
+                articles.append(Article(source=source['name'], **entry))
+            
+        except Exception as e:
+            logger.error(f"Error fetching from {source['name']}: {e}")
+        
+        return articles
     
-    def format_tweet(self, article: Dict) -> str:
+    def _parse_entries(self, source: Dict, feed_body: bytes, response_headers: Optional[Dict]) -> List[Dict]:
+        """Parse a feed and return the fields we keep for its Chargers-related entries."""
+        # We only read plain title/summary text, so skip feedparser's HTML
+        # sanitizing and relative-link rewriting (the CPU-heavy part of a parse)
+        feed = feedparser.parse(
+            feed_body,
+            response_headers=response_headers,
+            sanitize_html=False,
+            resolve_relative_uris=False
+        )
+        
+        entries = []
+        matches_keywords = self._keyword_matchers[source['url']]
+        for entry in feed.entries:
+            # Check if article is about Chargers
+            title = entry.get('title', '')
+            summary = entry.get('summary', '')
+            if not title and not summary:
+                continue
+            
+            # Check for keywords; the title usually matches, so the (much longer)
+            # summary is only lowercased and scanned when it doesn't
+            if matches_keywords(title) or matches_keywords(summary):
+                entries.append({
+                    'title': title,
+                    'link': entry.get('link', ''),
+                    'published': entry.get('published', ''),
+                    'pub_ts': parse_published(entry.get('published_parsed'))
+                })
+        
+        logger.info(f"Found {len(feed.entries)} articles from {source['name']}")
+        return entries
+    
+    def format_tweet(self, article: Article) -> str:
         """Format article into a tweet (max 280 characters)."""
-        title = article['title']
-        link = article['link']
+        title = article.title or 'No title'
+        link = article.link
         
         # Remove HTML tags from title
-        title = re.sub(r'<[^>]+>', '', title)
+        if '<' in title:
+            title = _HTML_TAG_RE.sub('', title)
         
         # Truncate title if needed to fit in tweet with link
-        max_title_length = 280 - len(link) - 10  # 10 chars for "..." and spacing
-        
-        if len(title) > max_title_length:
-            title = title[:max_title_length - 3] + "..."
+        if len(title) > MAX_TITLE_LENGTH:
+            title = title[:MAX_TITLE_LENGTH - 3] + "..."
         
         tweet = f"{title}\n\n{link}"
         
         return tweet
     
-    def is_recent_article(self, article: Dict, hours_threshold: int = 24) -> bool:
-        """Check if article was published within the last N hours."""
-        try:
-            if not article.get('published_parsed'):
-                # If no date available, assume it's recent
-                return True
-            
-            published_time = datetime(*article['published_parsed'][:6])
-            time_diff = (datetime.now() - published_time.replace(tzinfo=None)).total_seconds() / 3600
-            return time_diff <= hours_threshold
-        except Exception as e:
-            logger.warning(f"Error parsing article date: {e}")
-            # If we can't parse the date, assume it's recent
-            return True
-    
     def post_tweet(self, tweet_text: str) -> bool:
         """Post a tweet to Twitter."""
         try:
@@ -198,6 +689,21 @@ class ChargersNewsBot:
             logger.error(f"Error posting tweet: {e}")
             return False
     
+    def _create_reply(self, tweet_text: str, in_reply_to_tweet_id: str):
+        """Post a reply, retrying briefly if the parent tweet isn't visible yet."""
+        for attempt in range(REPLY_RETRIES + 1):
+            try:
+                return self.client.create_tweet(
+                    text=tweet_text,
+                    in_reply_to_tweet_id=in_reply_to_tweet_id
+                )
+            except (tweepy.BadRequest, tweepy.NotFound) as e:
+                if attempt == REPLY_RETRIES:
+                    raise
+                delay = REPLY_RETRY_DELAY_SECONDS * (2 ** attempt)
+                logger.warning(f"Reply to {in_reply_to_tweet_id} failed ({e}), retrying in {delay}s")
+                time.sleep(delay)
+    
     def post_tweet_thread(self, tweet_texts: List[str]) -> bool:
         """Post a thread of tweets to Twitter, linking them together."""
         if not tweet_texts:
@@ -210,20 +716,13 @@ class ChargersNewsBot:
             for i, tweet_text in enumerate(tweet_texts, 1):
                 # If this is not the first tweet, reply to the previous one
                 if previous_tweet_id:
-                    response = self.client.create_tweet(
-                        text=tweet_text,
-                        in_reply_to_tweet_id=previous_tweet_id
-                    )
+                    response = self._create_reply(tweet_text, previous_tweet_id)
                 else:
                     response = self.client.create_tweet(text=tweet_text)
                 
                 tweet_id = response.data['id']
                 logger.info(f"Thread tweet {i}/{len(tweet_texts)} posted: {tweet_id}")
                 previous_tweet_id = tweet_id
-                
-                # Wait a bit between tweets to ensure proper threading
-                if i < len(tweet_texts):
-                    time.sleep(2)
             
             logger.info(f"Thread posted successfully with {len(tweet_texts)} tweets")
             return True
@@ -233,18 +732,15 @@ class ChargersNewsBot:
     
     def generate_heartbreaking_loss_thread(self) -> List[str]:
         """Generate a tweet thread about a past heartbreaking Chargers loss using AI."""
-        # Debug: Check environment variables (without exposing full API keys)
-        # Also check raw environment variables
-        import os
         if not self.ai_client:
-            provider_name = AI_PROVIDER.lower()
+            provider_name = self.ai_provider
             # Check if the API key is actually set
-            if AI_PROVIDER == "groq":
+            if provider_name == "groq":
                 if not GROQ_API_KEY:
                     raise ValueError(f"{provider_name} API client not initialized. Please set GROQ_API_KEY as an environment variable or in your .env file.")
                 else:
                     raise ValueError(f"{provider_name} API client failed to initialize. Check that GROQ_API_KEY is valid.")
-            elif AI_PROVIDER == "gemini":
+            elif provider_name == "gemini":
                 if not GEMINI_API_KEY:
                     raise ValueError(f"{provider_name} API client not initialized. Please set GEMINI_API_KEY as an environment variable or in your .env file.")
                 else:
@@ -255,34 +751,11 @@ class ChargersNewsBot:
                 else:
                     raise ValueError(f"{provider_name} API client failed to initialize. Check that OPENAI_API_KEY is valid.")
         
-        # Some famous heartbreaking Chargers losses to give context
-        prompt = """Generate a Twitter thread (8-12 tweets) about a past heartbreaking Chargers loss.
-
-CRITICAL: Search Pro-Football-Reference.com to verify ALL facts. Only include verified information.
-
-Thread structure:
-1. START: Context (who, where, when, what it meant) - verify from Pro-Football-Reference.com
-2. Tell the full game story chronologically with key moments
-3. Include actual scores, players, plays - all verified from Pro-Football-Reference.com
-4. Build tension toward the heartbreaking ending
-
-Requirements:
-- Verify scores, player names, dates, stadium from Pro-Football-Reference.com
-- Each tweet under 280 characters
-- Number tweets (1/8, 2/8, etc.)
-- Conversational fan voice
-- If you can't verify it from Pro-Football-Reference.com, don't include it
-
-Format: One tweet per line, ready to post."""
-
         try:
-            system_prompt = "You are a passionate Los Angeles Chargers fan who loves to commiserate about heartbreaking losses. You write engaging, emotional Twitter threads that tell the complete story of games. Always start by establishing context: which teams are playing, where the game was played, and what the game meant (playoff implications, rivalry, must-win situation, etc.). Then include all key moments, scores, plays, and turning points. You have an encyclopedic knowledge of Chargers history and can recount games in vivid detail, taking readers through the entire game experience moment by moment."
-            
             if self.ai_provider == "gemini":
                 logger.info(f"Generating thread using Google Gemini ({GEMINI_MODEL})...")
-                full_prompt = f"{system_prompt}\n\n{prompt}"
                 response = self.ai_client.generate_content(
-                    full_prompt,
+                    HEARTBREAK_GEMINI_PROMPT,
                     generation_config={
                         "temperature": 0.8,
                         "max_output_tokens": 2000,
@@ -297,8 +770,8 @@ Format: One tweet per line, ready to post."""
                 response = self.ai_client.chat.completions.create(
                     model=model,
                     messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": prompt}
+                        {"role": "system", "content": HEARTBREAK_SYSTEM_PROMPT},
+                        {"role": "user", "content": HEARTBREAK_PROMPT}
                     ],
                     temperature=0.8,
                     max_tokens=2000
@@ -312,8 +785,8 @@ Format: One tweet per line, ready to post."""
             cleaned_tweets = []
             for tweet in tweets:
                 # Remove any leading numbering like "1/5" or "Tweet 1:" if present
-                tweet = re.sub(r'^\d+/\d+\s*[-:]?\s*', '', tweet)
-                tweet = re.sub(r'^Tweet\s+\d+:\s*', '', tweet, flags=re.IGNORECASE)
+                tweet = _TWEET_NUM_RE.sub('', tweet)
+                tweet = _TWEET_LABEL_RE.sub('', tweet)
                 tweet = tweet.strip()
                 if tweet and len(tweet) <= 280:
                     cleaned_tweets.append(tweet)
@@ -366,17 +839,6 @@ Format: One tweet per line, ready to post."""
             print(f"❌ Error: {e}")
             return False
     
-    def get_article_publish_time(self, article: Dict) -> datetime:
-        """Get the publish time of an article for sorting."""
-        try:
-            if article.get('published_parsed'):
-                return datetime(*article['published_parsed'][:6])
-            else:
-                # If no date, return a very old date so they sort last
-                return datetime(2000, 1, 1)
-        except:
-            return datetime(2000, 1, 1)
-    
     def run_dry_run(self):
         """Dry run mode: Gets the most recent Chargers article and drafts a tweet (does NOT post)."""
         logger.info("Starting Chargers Bot in DRY RUN MODE...")
@@ -392,13 +854,10 @@ Format: One tweet per line, ready to post."""
             print("❌ No Chargers articles found to draft a tweet from.")
             return False
         
-        # Sort articles by publish date (most recent first)
-        articles.sort(key=self.get_article_publish_time, reverse=True)
-        
-        # Get the most recent article
-        test_article = articles[0]
+        # Get the most recent article (single pass, no need to sort them all)
+        test_article = max(articles, key=attrgetter('pub_ts'))
         
-        logger.info(f"DRY RUN: Found most recent article: {test_article['title']}")
+        logger.info(f"DRY RUN: Found most recent article: {test_article.title}")
         
         # Format the tweet
         try:
@@ -406,16 +865,18 @@ Format: One tweet per line, ready to post."""
             
             # Print the draft tweet
             print("📰 ARTICLE:")
-            print(f"   Title: {test_article['title']}")
-            print(f"   Source: {test_article['source']}")
-            print(f"   Published: {test_article.get('published', 'Unknown date')}")
-            print(f"   Link: {test_article['link']}")
+            print(f"   Title: {test_article.title or 'No title'}")
+            print(f"   Source: {test_article.source}")
+            print(f"   Published: {test_article.published or 'Unknown date'}")
+            print(f"   Link: {test_article.link}")
             print()
             print("📝 DRAFT TWEET:")
             print("-" * 60)
             print(tweet_text)
             print("-" * 60)
-            print(f"\n📊 Tweet length: {len(tweet_text)} / 280 characters")
+            # Twitter counts the link as a t.co URL, whatever its real length
+            tweet_length = len(tweet_text) - len(test_article.link) + TCO_URL_LENGTH
+            print(f"\n📊 Tweet length: {tweet_length} / 280 characters")
             print(f"\n✅ DRY RUN COMPLETE - Tweet would be posted in live mode")
             print("=" * 60 + "\n")
             
@@ -436,15 +897,12 @@ Format: One tweet per line, ready to post."""
             logger.warning("No Chargers articles found to test with!")
             return
         
-        # Sort articles by publish date (most recent first)
-        articles.sort(key=self.get_article_publish_time, reverse=True)
+        # Get the most recent article (single pass, no need to sort them all)
+        test_article = max(articles, key=attrgetter('pub_ts'))
         
-        # Get the most recent article
-        test_article = articles[0]
-        
-        logger.info(f"TEST MODE: Found most recent article: {test_article['title']}")
-        logger.info(f"Source: {test_article['source']}")
-        logger.info(f"Link: {test_article['link']}")
+        logger.info(f"TEST MODE: Found most recent article: {test_article.title}")
+        logger.info(f"Source: {test_article.source}")
+        logger.info(f"Link: {test_article.link}")
         
         # Format and post the tweet
         try:
@@ -467,32 +925,32 @@ Format: One tweet per line, ready to post."""
         """Main bot execution: fetch news and tweet about new articles."""
         logger.info("Starting Chargers Bot...")
         
-        articles = self.fetch_news()
-        logger.info(f"Found {len(articles)} total Chargers-related articles")
+        self.flush_posted_articles()
+        self.posted_articles = self.load_posted_articles()
         
-        # Filter out already posted articles and old articles
-        new_articles = []
-        for article in articles:
-            if article['link'] not in self.posted_articles:
-                # Only post recent articles (within last 24 hours)
-                if self.is_recent_article(article, hours_threshold=24):
-                    new_articles.append(article)
+        # Only unposted articles from the last 24 hours are returned; post the
+        # oldest first so the timeline reads in publication order
+        new_articles = self.fetch_news(skip_posted=True, recent_only_hours=24)
+        new_articles.sort(key=attrgetter('pub_ts'))
         
         logger.info(f"Found {len(new_articles)} new articles to post")
         
-        # Post tweets for new articles
-        for article in new_articles:
-            try:
-                tweet_text = self.format_tweet(article)
-                if self.post_tweet(tweet_text):
-                    self.save_posted_article(article['link'])
-                    logger.info(f"Posted: {article['title']}")
-                    # Wait a bit between tweets to avoid rate limits
-                    time.sleep(30)
-                else:
-                    logger.warning(f"Failed to post: {article['title']}")
-            except Exception as e:
-                logger.error(f"Error processing article {article['title']}: {e}")
+        try:
+            # Post tweets for new articles back to back; the client is created with
+            # wait_on_rate_limit, so tweepy only sleeps (until the reset time Twitter
+            # returns) when a rate limit is actually hit
+            for article in new_articles:
+                try:
+                    tweet_text = self.format_tweet(article)
+                    if self.post_tweet(tweet_text):
+                        self.save_posted_article(article.link, article.title)
+                        logger.info(f"Posted: {article.title}")
+                    else:
+                        logger.warning(f"Failed to post: {article.title}")
+                except Exception as e:
+                    logger.error(f"Error processing article {article.title}: {e}")
+        finally:
+            self.flush_posted_articles()
         
         logger.info("Bot run completed")
 
@@ -2,6 +2,7 @@
 Configuration settings for the Chargers Bot.
 """
 import os
+from types import MappingProxyType
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -39,6 +40,10 @@ GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-pro")
 # Bot Settings
 CHECK_INTERVAL_HOURS = int(os.getenv("CHECK_INTERVAL_HOURS", "6"))
 DEBUG = os.getenv("DEBUG", "False").lower() == "true"
+FEED_TIMEOUT_SECONDS = int(os.getenv("FEED_TIMEOUT_SECONDS", "15"))
+FEED_BODY_CACHE_SECONDS = int(os.getenv("FEED_BODY_CACHE_SECONDS", "300"))  # 0 disables
+# Private (0700) per-user directory for cached feed bodies
+FEED_BODY_CACHE_DIR = os.getenv("FEED_BODY_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "chargers-bot"))
 
 # News Sources - RSS Feeds focused on Chargers news
 NEWS_SOURCES = [
@@ -59,9 +64,24 @@ NEWS_SOURCES = [
     }
 ]
 
+# Freeze the sources (they're shared across fetch threads and never change at runtime).
+# Keywords are matched case-insensitively, so lowercase them once here instead of per entry.
+NEWS_SOURCES = tuple(
+    MappingProxyType({**source, "keywords": tuple(keyword.lower() for keyword in source["keywords"])})
+    for source in NEWS_SOURCES
+)
+
 # File to track posted articles (to avoid duplicates)
 POSTED_ARTICLES_FILE = "posted_articles.txt"
 
+# How long posted articles are remembered (the bot only posts articles from the last 24 hours)
+POSTED_RETENTION_DAYS = 30
+
+# File to remember ETag/Last-Modified and matched entries per feed (to skip unchanged feeds)
+FEED_CACHE_FILE = "feed_cache.json"
+# Feeds not fetched for this long are dropped from the cache
+FEED_CACHE_MAX_AGE_DAYS = 7
+
 def validate_config():
     """Validate that all required configuration is present."""
     required_vars = [
@@ -1,7 +1,6 @@
 """
 Scheduler to run the bot periodically.
 """
-import schedule
 import time
 import logging
 from bot import ChargersNewsBot
@@ -14,11 +13,18 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# Created on the first successful tick and reused, so the Twitter client,
+# posted-articles set and feed cache aren't rebuilt every run
+_bot = None
+
+
 def run_bot():
     """Run the bot once."""
+    global _bot
     try:
-        bot = ChargersNewsBot()
-        bot.run()
+        if _bot is None:
+            _bot = ChargersNewsBot()
+        _bot.run()
     except Exception as e:
         logger.error(f"Error running bot: {e}")
 
@@ -27,16 +33,12 @@ def main():
     """Schedule and run the bot periodically."""
     logger.info(f"Starting scheduler - checking every {CHECK_INTERVAL_HOURS} hours")
     
-    # Run immediately on start
-    run_bot()
-    
-    # Schedule periodic runs
-    schedule.every(CHECK_INTERVAL_HOURS).hours.do(run_bot)
-    
-    # Keep the script running
+    # Run immediately on start, then sleep straight through to each next run.
+    # Runs are spaced from their start times, so the cadence doesn't drift by run time.
     while True:
-        schedule.run_pending()
-        time.sleep(60)  # Check every minute
+        next_run = time.monotonic() + CHECK_INTERVAL_HOURS * 3600
+        run_bot()
+        time.sleep(max(0, next_run - time.monotonic()))
 
 
 if __name__ == "__main__":
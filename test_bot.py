@@ -3,17 +3,27 @@ Test script to preview what the bot would post without actually posting.
 """
 import feedparser
 import re
-from datetime import datetime
+import calendar
+import time
 from config import NEWS_SOURCES, POSTED_ARTICLES_FILE
+from bot import MAX_TITLE_LENGTH, canonical_url, title_key
 import os
 
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+
 def load_posted_articles():
-    """Load list of already posted article URLs."""
+    """Load already posted article URLs and normalized titles."""
     if not os.path.exists(POSTED_ARTICLES_FILE):
         return set()
     try:
-        with open(POSTED_ARTICLES_FILE, 'r') as f:
-            return set(line.strip() for line in f if line.strip())
+        with open(POSTED_ARTICLES_FILE, 'rb') as f:
+            data = f.read().decode('utf-8')
+        # One read and a C-level split; lines are "<timestamp>\t<url>[\t<title>]"
+        # (older files contain just the URL)
+        posted = set()
+        for line in data.splitlines():
+            posted.update(line.split('\t')[1:] or [line])
+        return posted - {''}
     except:
         return set()
 
@@ -22,18 +32,18 @@ def is_recent_article(entry, hours_threshold=24):
     try:
         if not entry.get('published_parsed'):
             return True
-        published_time = datetime(*entry['published_parsed'][:6])
-        time_diff = (datetime.now() - published_time.replace(tzinfo=None)).total_seconds() / 3600
-        return time_diff <= hours_threshold
+        # published_parsed is UTC, so compare Unix timestamps (not naive local datetimes)
+        return time.time() - calendar.timegm(entry['published_parsed'][:6]) <= hours_threshold * 3600
     except:
         return True
 
 def format_tweet(title, link):
     """Format article into a tweet (max 280 characters)."""
-    title = re.sub(r'<[^>]+>', '', title)
-    max_title_length = 280 - len(link) - 10
-    if len(title) > max_title_length:
-        title = title[:max_title_length - 3] + "..."
+    # Titles rarely contain HTML, so only run the regex when there's a tag to strip
+    if '<' in title:
+        title = _HTML_TAG_RE.sub('', title)
+    if len(title) > MAX_TITLE_LENGTH:
+        title = title[:MAX_TITLE_LENGTH - 3] + "..."
     return f"{title}\n\n{link}"
 
 print("🔍 Testing Chargers Bot...\n")
@@ -47,15 +57,26 @@ for source in NEWS_SOURCES:
     try:
         feed = feedparser.parse(source['url'])
         print(f"   Found {len(feed.entries)} articles in feed")
+        keywords = source['keywords']  # Already lowercased in config.py
         
         for entry in feed.entries:
             title = entry.get('title', '').lower()
-            summary = entry.get('summary', '').lower()
-            text_content = f"{title} {summary}"
+            matched = any(keyword in title for keyword in keywords)
+            if not matched:
+                # Most matches are in the title, so the summary is only lowercased when needed
+                summary = entry.get('summary', '').lower()
+                matched = any(keyword in summary for keyword in keywords)
             
-            if any(keyword.lower() in text_content for keyword in source['keywords']):
+            if matched:
                 link = entry.get('link', '')
-                if link not in posted_articles and is_recent_article(entry, 24):
+                # Posted URLs are stored in canonical form (older lines hold the raw link),
+                # alongside the title so syndicated copies at other URLs count as posted
+                already_posted = (
+                    link in posted_articles
+                    or canonical_url(link) in posted_articles
+                    or title_key(entry.get('title', '')) in posted_articles
+                )
+                if not already_posted and is_recent_article(entry, 24):
                     article = {
                         'title': entry.get('title', 'No title'),
                         'link': link,